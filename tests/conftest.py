@@ -6,7 +6,7 @@ from dotenv import load_dotenv
 load_dotenv()
 
 
-@pytest.fixture
+@pytest.fixture(scope='session')
 def valid_api_key():
     key = os.environ.get('TRANSLINK_API_KEY')
     if not key:
@@ -23,13 +23,19 @@ def remove_response_headers_func(*headers_to_remove):
     return sanitize_response
 
 
+#: Scrubs volatile or sensitive headers from recorded responses.
+scrub_response_headers = remove_response_headers_func('Set-Cookie', 'Date')
+
+
 @pytest.fixture(scope='module')
 def vcr_config():
     return {
         'filter_headers': ['user-agent', 'set-cookie', 'connection', 'request-context'],
         'filter_query_parameters': ['apikey'],
         'decode_compressed_response': True,
-        'before_record_response': remove_response_headers_func('Set-Cookie', 'Date'),
+        'before_record_response': scrub_response_headers,
+        'match_on': ['method', 'scheme', 'host', 'path', 'query'],
+        'record_mode': 'once',
     }
 
 
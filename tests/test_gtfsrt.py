@@ -3,14 +3,14 @@ from requests import codes
 
 from tilapya.errors import TransLinkAPIError
 from tilapya.gtfsrt import GTFSRT
-from .conftest import remove_response_headers_func
+from .conftest import scrub_response_headers
 
 
 # Apply VCR to all tests in this file.
-pytestmark = pytest.mark.vcr(before_record_response=remove_response_headers_func('Set-Cookie'))
+pytestmark = pytest.mark.vcr(before_record_response=scrub_response_headers)
 
 
-@pytest.fixture
+@pytest.fixture(scope='module')
 def authed_gtfs(valid_api_key):
     return GTFSRT(api_key=valid_api_key)
 
@@ -23,6 +23,12 @@ def test_download_position(authed_gtfs):
     assert authed_gtfs.position().content
 
 
+@pytest.mark.parametrize('vcr_cassette_name', ['test_download_position'])
+def test_download_position_streamed(authed_gtfs, vcr_cassette_name):
+    with authed_gtfs.position(stream=True) as resp:
+        assert b''.join(resp.iter_content(chunk_size=64 * 1024))
+
+
 def test_download_alerts(authed_gtfs):
     assert authed_gtfs.service_alerts().content
 
@@ -33,3 +39,4 @@ def test_gtfsrt_invalid_key():
     assert info.value.response.status_code == codes.forbidden
     assert not info.value.code
     assert not info.value.message
+    assert not info.value.description
@@ -2,11 +2,13 @@ import warnings
 from datetime import datetime
 
 import pytest
+from marshmallow import ValidationError
 from requests import codes
 
 from tilapya.errors import ErrorCodes as EC
 from tilapya.errors import TransLinkAPIError
-from tilapya.rtti import (RTTI, TRANSLINK_TZ, parse_last_update,
+from tilapya.rtti import (_BUSES_SCHEMA, _STOP_SCHEMA, RTTI, TRANSLINK_TZ,
+                          _load_buses, _load_stop, parse_last_update,
                           parse_leave_time)
 
 
@@ -16,7 +18,7 @@ pytestmark = pytest.mark.vcr
 TS_FORMAT = '%Y-%m-%d %H:%M:%S'
 
 
-@pytest.fixture
+@pytest.fixture(scope='module')
 def authed_rtti(valid_api_key):
     return RTTI(api_key=valid_api_key)
 
@@ -25,11 +27,13 @@ def authed_rtti(valid_api_key):
     ['9:59pm 2018-02-13', '2018-02-13 21:30:00', '2018-02-13 21:59:00'],
     ['12:09am', '2018-02-13 23:00:00', '2018-02-14 00:09:00'],
     ['10:00pm', '2018-02-13 23:00:00', '2018-02-14 22:00:00'],  # Not ideal.
+    ['12:05pm 2018-02-13', '2018-02-13 11:30:00', '2018-02-13 12:05:00'],
+    ['12:05AM 2018-02-14', '2018-02-13 23:30:00', '2018-02-14 00:05:00'],
 ])
 def test_parse_leave_time(value, relative_to, expected):
-    relative_to = TRANSLINK_TZ.localize(datetime.strptime(relative_to, TS_FORMAT))
+    relative_to = datetime.strptime(relative_to, TS_FORMAT).replace(tzinfo=TRANSLINK_TZ)
     parsed = parse_leave_time(value, relative_to)
-    assert parsed == TRANSLINK_TZ.localize(datetime.strptime(expected, TS_FORMAT))
+    assert parsed == datetime.strptime(expected, TS_FORMAT).replace(tzinfo=TRANSLINK_TZ)
 
 
 @pytest.mark.parametrize('value,relative_to,expected', [
@@ -38,17 +42,97 @@ def test_parse_leave_time(value, relative_to, expected):
     ['01:00:00 am', '2018-01-02 00:30:00', '2018-01-01 01:00:00'],
 ])
 def test_parse_last_update(value, relative_to, expected):
-    relative_to = TRANSLINK_TZ.localize(datetime.strptime(relative_to, TS_FORMAT))
+    relative_to = datetime.strptime(relative_to, TS_FORMAT).replace(tzinfo=TRANSLINK_TZ)
     parsed = parse_last_update(value, relative_to)
-    assert parsed == TRANSLINK_TZ.localize(datetime.strptime(expected, TS_FORMAT))
+    assert parsed == datetime.strptime(expected, TS_FORMAT).replace(tzinfo=TRANSLINK_TZ)
     assert parsed.isoformat().endswith('-08:00') or parsed.isoformat().endswith('-07:00')
 
 
+@pytest.mark.parametrize('func,value', [
+    [parse_leave_time, '13:00pm'],
+    [parse_leave_time, '9:59 pm 2018-02-13'],
+    [parse_last_update, '08:53 pm'],
+    [parse_last_update, '00:53:10 am'],
+    [parse_leave_time, '9:59pm\n'],
+    [parse_last_update, '01:26:41 pm\n'],
+])
+def test_parse_time_invalid(func, value):
+    with pytest.raises(ValueError):
+        func(value)
+
+
+STOP_JS = {
+    'StopNo': 53095, 'Name': 'WB DOVER ST FS ROYAL OAK AVE', 'BayNo': 'N', 'City': 'BURNABY',
+    'OnStreet': 'DOVER ST', 'AtStreet': 'ROYAL OAK AVE', 'Latitude': 49.22998, 'Longitude': -122.98964,
+    'WheelchairAccess': 0, 'Distance': -1, 'Routes': '144',
+}
+
+BUS_JS = {
+    'VehicleNo': '11303', 'TripId': 9287783, 'RouteNo': '252', 'Direction': 'EAST',
+    'Destination': 'PARK ROYAL - ONLY', 'Pattern': 'EB1NEW', 'Latitude': 49.334517, 'Longitude': -123.145967,
+    'RecordedTime': '01:26:41 pm', 'RouteMap': {'Href': 'http://nb.translink.ca/geodata/252.kmz'},
+}
+
+
+def test_fast_loaders_match_schemas():
+    assert _load_stop(STOP_JS) == _STOP_SCHEMA.load(STOP_JS)
+    assert _load_buses([BUS_JS]) == _BUSES_SCHEMA.load([BUS_JS])
+
+
+@pytest.mark.parametrize('change', [
+    {'StopNo': None},
+    {'Name': 1},
+    {'WheelchairAccess': 'maybe'},
+    {'Latitude': 'nan'},
+    {'Latitude': 10 ** 400},
+    {'Unexpected': 'field'},
+])
+def test_fast_loaders_reject_what_schemas_reject(change):
+    js = dict(STOP_JS, **change)
+    with pytest.raises((TypeError, ValueError)):
+        _load_stop(js)
+    with pytest.raises(ValidationError):
+        _STOP_SCHEMA.load(js)
+
+
+@pytest.mark.parametrize('href', ['nb.translink.ca/geodata/252.kmz', '/geodata/252.kmz', 252])
+def test_route_map_requires_absolute_http_url(href):
+    js = dict(BUS_JS, RouteMap={'Href': href})
+    with pytest.raises((TypeError, ValueError)):
+        _load_buses([js])
+    with pytest.raises(ValidationError):
+        _BUSES_SCHEMA.load([js])
+
+
+@pytest.mark.parametrize('value', ['25:00:00 pm', None])
+def test_schema_rejects_bad_time(value):
+    with pytest.raises(ValidationError):
+        _BUSES_SCHEMA.load([dict(BUS_JS, RecordedTime=value)])
+
+
 def test_stop_identity(authed_rtti):
     stop = authed_rtti.stop('53095')
     assert stop.StopNo == 53095
 
 
+@pytest.mark.parametrize('vcr_cassette_name', ['test_stop_identity'])
+def test_stop_cached(valid_api_key, vcr_cassette_name):
+    # The cassette has only one response, so a second request would fail.
+    api = RTTI(api_key=valid_api_key, cache_ttl=60)
+    stop = api.stop('53095')
+    assert api.stop('53095') == stop
+
+
+@pytest.mark.parametrize('vcr_cassette_name', ['test_route[144-144]'])
+def test_route_cached_unaffected_by_caller(valid_api_key, vcr_cassette_name):
+    # The cassette has only one response, so a second request would fail.
+    api = RTTI(api_key=valid_api_key, cache_ttl=60)
+    route = api.route('144')
+    assert route.Patterns
+    route.Patterns.clear()
+    assert api.route('144').Patterns
+
+
 @pytest.mark.parametrize('lat,long,radius,route', [
     [49.248523999, -123.108800, None, None],
     [49.248523999, -123.108800, 500, None],
@@ -68,6 +152,7 @@ def test_stop_errors(authed_rtti, stop, expect_code):
     with pytest.raises(TransLinkAPIError) as info:
         authed_rtti.stop(stop)
     assert info.value.code == expect_code.code
+    assert info.value.description == expect_code.desc
 
 
 @pytest.mark.parametrize('lat,long,radius,route,expect_code', [
@@ -117,6 +202,20 @@ def test_stop_estimates_errors(authed_rtti, stop, count, timeframe, route, expec
     assert info.value.code == expect_code.code
 
 
+@pytest.mark.parametrize('vcr_cassette_name', ['test_stop_estimates_with_results[60980-None-None-None]'])
+def test_stop_estimates_bulk(authed_rtti, vcr_cassette_name):
+    [estimates] = authed_rtti.stop_estimates_bulk(['60980'])
+    assert estimates
+
+
+def test_stop_estimates_bulk_errors(authed_rtti):
+    # The cassette combines the interactions from test_stop_estimates_with_results[60980-None-None-None]
+    # and test_stop_estimates_errors[ABC-None-None-None-expect_code3], rather than a fresh recording.
+    with pytest.raises(TransLinkAPIError) as info:
+        authed_rtti.stop_estimates_bulk(['60980', 'ABC'])
+    assert info.value.code == EC.est_invalid_stop.code
+
+
 def test_get_buses(authed_rtti):
     all_buses = authed_rtti.buses()
     assert len(all_buses) > 0
@@ -191,6 +290,13 @@ def test_route(authed_rtti, route_number, expect_route_number):
     assert route.RouteNo == expect_route_number
 
 
+def test_routes_bulk(authed_rtti):
+    # The cassette combines the interactions from test_route[2-002], [144-144] and [N9-N9],
+    # rather than a fresh recording.
+    routes = authed_rtti.routes_bulk(['2', '144', 'N9'])
+    assert [route.RouteNo for route in routes] == ['002', '144', 'N9']
+
+
 @pytest.mark.parametrize('route,expect_code', [
     ['0', EC.route_invalid_route],
     # TODO: Find example of 'route not found'.
@@ -262,4 +368,5 @@ def test_rtti_ad_key(key):
         RTTI(api_key=key).route('144')
     assert info.value.response.status_code == codes.server_error  # It's never 403.
     assert info.value.code == EC.invalid_api_key.code
+    assert info.value.description == EC.invalid_api_key.desc
     assert info.value.message
@@ -0,0 +1,53 @@
+import time
+
+import pytest
+
+from tilapya import _util
+from tilapya._util import TransLinkAPIBase, TTLCache
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(_util, 'monotonic', lambda: now[0])
+    return now
+
+
+def test_ttl_cache_expires(clock):
+    cache = TTLCache(ttl=10)
+    cache.set('a', 1)
+    clock[0] += 9
+    assert cache.get('a') == 1
+    clock[0] += 1
+    assert cache.get('a') is None
+
+
+def test_ttl_cache_evicts_expired_then_oldest(clock):
+    cache = TTLCache(ttl=10, maxsize=2)
+    cache.set('a', 1)
+    clock[0] += 5
+    cache.set('b', 2)
+    cache.set('c', 3)
+    assert cache.get('a') is None
+    assert (cache.get('b'), cache.get('c')) == (2, 3)
+
+    # Nothing has expired now, so the oldest entry makes room.
+    cache.set('d', 4)
+    assert cache.get('b') is None
+    assert (cache.get('c'), cache.get('d')) == (3, 4)
+
+
+def test_map_concurrently_cancels_pending_calls_on_error():
+    called = []
+
+    def call(arg):
+        called.append(arg)
+        if arg == 0:
+            raise ValueError(arg)
+        time.sleep(0.01)
+        return arg
+
+    api = TransLinkAPIBase('https://example.com', api_key='key')
+    with pytest.raises(ValueError):
+        api._map_concurrently(call, range(100), max_workers=1)
+    assert len(called) < 100
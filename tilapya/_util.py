@@ -1,13 +1,72 @@
 """
 Tilapya's internal utilities. Not part of the public API.
 """
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from time import monotonic
+
 from requests import Session
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 from tilapya import __version__
 from .errors import TransLinkAPIError
 
-
-USER_AGENT = '{}/{}'.format("tilapya", __version__)
+try:
+    from orjson import loads as loads_json
+except ImportError:  # orjson is an optional speedup.
+    from json import loads as loads_json
+
+
+USER_AGENT = f'tilapya/{__version__}'
+POOL_SIZE = 10
+
+
+def pooled_session():
+    """
+    Make the default session: keep-alive connection pool, with retries on gateway errors.
+    """
+    session = Session()
+    retries = Retry(
+        total=3, backoff_factor=0.2, status_forcelist=[502, 503, 504],
+        raise_on_status=False)
+    session.mount('https://', HTTPAdapter(
+        pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE, max_retries=retries))
+    return session
+
+
+class TTLCache(object):
+    """
+    A thread-safe mapping whose entries expire ``ttl`` seconds after they're set.
+    When full, expired entries are dropped first, then the oldest.
+    """
+
+    def __init__(self, ttl, maxsize=1024):
+        self._ttl = ttl
+        self._maxsize = maxsize
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return default
+            value, expires_at = entry
+            if expires_at <= monotonic():
+                del self._entries[key]
+                return default
+            return value
+
+    def set(self, key, value):
+        now = monotonic()
+        with self._lock:
+            self._entries.pop(key, None)
+            if len(self._entries) >= self._maxsize:
+                self._entries = {k: e for k, e in self._entries.items() if e[1] > now}
+                while len(self._entries) >= self._maxsize:
+                    del self._entries[next(iter(self._entries))]
+            self._entries[key] = (value, now + self._ttl)
 
 
 class TransLinkAPIBase(object):
@@ -17,15 +76,14 @@ class TransLinkAPIBase(object):
         self._base_url = base_url
 
         self._api_key = api_key
-        self._session = session or Session()
+        self._session = session or pooled_session()
         self._ua = self._session.headers.get('User-Agent', '') + ' ' + USER_AGENT
 
     def _request(self, url_endpoint, method='GET', params=None, headers=None, **kwargs):
-        params = params or {}
-        params['apikey'] = self._api_key
-
         # Don't pass along parameters with null values.
-        params = {k: v for k, v in params.items() if v is not None}
+        # Builds a new dict, so the caller's params are left untouched.
+        params = {k: v for k, v in params.items() if v is not None} if params else {}
+        params['apikey'] = self._api_key
 
         headers = headers or {}
         headers['User-Agent'] = self._ua
@@ -48,14 +106,44 @@ class TransLinkAPIBase(object):
 
         return size
 
+    def _map_concurrently(self, func, args, max_workers=None):
+        """
+        Call ``func`` on each of ``args`` from a thread pool, returning results in order.
+        If calls raise, the exception for the earliest such argument is re-raised.
+        Calls that haven't started by then are cancelled, rather than waited for.
+        """
+        with ThreadPoolExecutor(max_workers=max_workers or POOL_SIZE) as executor:
+            try:
+                return list(executor.map(func, args))
+            except BaseException:
+                executor.shutdown(cancel_futures=True)
+                raise
+
     def _get_json(self, url_endpoint, params=None):
         return self._request(
             url_endpoint, method='GET', params=params,
             headers={'Accept': 'application/json'})
 
-    def _get_deserialized(self, url_endpoint, schema, params=None):
+    def _get_decoded(self, url_endpoint, params=None):
         resp = self._get_json(url_endpoint, params=params)
         if not resp.ok:
             raise TransLinkAPIError(resp)
 
-        return schema.loads(resp.text)
+        # Parse the raw bytes, skipping requests' charset detection.
+        return loads_json(resp.content)
+
+    def _get_deserialized(self, url_endpoint, schema, params=None, loader=None):
+        return self._deserialize(self._get_decoded(url_endpoint, params=params), schema, loader=loader)
+
+    @staticmethod
+    def _deserialize(js, schema, loader=None):
+        """
+        :param loader: Optional fast equivalent of ``schema.load``.
+            If it raises, ``schema`` loads the data instead, and reports any problem with it.
+        """
+        if loader is not None:
+            try:
+                return loader(js)
+            except (KeyError, TypeError, ValueError):
+                pass
+        return schema.load(js)
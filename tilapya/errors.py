@@ -17,24 +17,23 @@ class TransLinkAPIError(HTTPError):
     """
 
     def __init__(self, response):
-        blurb = 'HTTP {} Error'.format(response.status_code)
+        blurb = f'HTTP {response.status_code} Error'
 
         self.code = ''
         self.message = ''
         try:
             js = response.json()
-            blurb += ': '
             self.code = js.get('Code', '')  # Code only in RTTI.
             self.message = js['Message']
-            if self.code:
-                blurb += 'code {} '.format(self.code)
-            blurb += "'{}'".format(self.message)
-        except (ValueError, KeyError):
+        except (ValueError, KeyError, AttributeError):
             # Not JSON, as with bad API key for GTFS-RT.
-            # Or JSON but without Message.
+            # Or JSON but not an object with Message.
             pass
+        else:
+            code = f'code {self.code} ' if self.code else ''
+            blurb = f"{blurb}: {code}'{self.message}'"
 
-        super(TransLinkAPIError, self).__init__(blurb, response=response)
+        super().__init__(blurb, response=response)
 
     @property
     def description(self):
@@ -101,4 +100,4 @@ class ErrorCodes(object):
     status_invalid_service = ErrorCodeInfo('5001', 'Invalid service name')
 
 
-_code_to_desc = {v.code: v.desc for v in ErrorCodes.__dict__ if isinstance(v, ErrorCodeInfo)}
+_code_to_desc = {v.code: v.desc for v in vars(ErrorCodes).values() if isinstance(v, ErrorCodeInfo)}
@@ -32,43 +32,51 @@ class GTFSRT(TransLinkAPIBase):
         """
         :param api_key: TransLink API key.
         :param requests.Session session: Session to use, instead of the default.
+            The default session keeps connections alive for reuse,
+            and retries requests that fail with a 502, 503, or 504 status.
         """
-        super(GTFSRT, self).__init__(
+        super().__init__(
             'https://gtfs.translink.ca/v2',
             api_key=api_key, session=session)
 
-    def trip_updates(self):
+    def _get_feed(self, url_endpoint, stream):
+        resp = self._request(url_endpoint, stream=stream)
+        if not resp.ok:
+            raise TransLinkAPIError(resp)
+        return resp
+
+    def trip_updates(self, stream=False):
         """
         Request the trip updates feed.
 
+        :param bool stream: If true, return as soon as the headers arrive,
+            leaving the body to be read with ``iter_content()`` or ``raw``.
+            Close the response when done with it.
         :returns: The response. The raw protobuf data is in ``content``.
         :rtype: requests.Response
         """
-        resp = self._request('gtfsrealtime')
-        if not resp.ok:
-            raise TransLinkAPIError(resp)
-        return resp
+        return self._get_feed('gtfsrealtime', stream)
 
-    def position(self):
+    def position(self, stream=False):
         """
         Request the position feed.
 
+        :param bool stream: If true, return as soon as the headers arrive,
+            leaving the body to be read with ``iter_content()`` or ``raw``.
+            Close the response when done with it.
         :returns: The response. The raw protobuf data is in ``content``.
         :rtype: requests.Response
         """
-        resp = self._request('gtfsposition')
-        if not resp.ok:
-            raise TransLinkAPIError(resp)
-        return resp
+        return self._get_feed('gtfsposition', stream)
 
-    def service_alerts(self):
+    def service_alerts(self, stream=False):
         """
         Request the service alerts feed.
 
+        :param bool stream: If true, return as soon as the headers arrive,
+            leaving the body to be read with ``iter_content()`` or ``raw``.
+            Close the response when done with it.
         :returns: The response. The raw protobuf data is in ``content``.
         :rtype: requests.Response
         """
-        resp = self._request('gtfsalerts')
-        if not resp.ok:
-            raise TransLinkAPIError(resp)
-        return resp
+        return self._get_feed('gtfsalerts', stream)
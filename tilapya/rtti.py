@@ -51,17 +51,21 @@ Usage examples
 
 
 """
+import math
+import re
+import sys
 from collections import namedtuple
 from datetime import datetime, timedelta
+from functools import partial
+from zoneinfo import ZoneInfo
 
-from marshmallow import Schema, fields, post_load
-from pytz import timezone
+from marshmallow import Schema, ValidationError, fields, post_load
 
-from ._util import TransLinkAPIBase
+from ._util import TransLinkAPIBase, TTLCache
 
 
 #: TransLink's local time zone (Vancouver).
-TRANSLINK_TZ = timezone('America/Vancouver')
+TRANSLINK_TZ = ZoneInfo('America/Vancouver')
 
 
 class Stop(namedtuple('Stop', [
@@ -207,53 +211,101 @@ class StopSchema(Schema):
         return Stop(**js)
 
 
+# TransLink's two time formats, e.g. "5:20pm" or "05:20pm 2018-02-18", and "05:20:30 pm".
+# Matched by hand because strptime is slow, and its %p depends on the locale.
+_LEAVE_TIME_RE = re.compile(r'(\d{1,2}):(\d{2})([ap]m)(?: (\d{4})-(\d{2})-(\d{2}))?', re.IGNORECASE)
+_LAST_UPDATE_RE = re.compile(r'(\d{1,2}):(\d{2}):(\d{2}) ([ap]m)', re.IGNORECASE)
+_ONE_DAY = timedelta(days=1)
+
+
+def _hour_24(hour, meridiem):
+    hour = int(hour)
+    if not 1 <= hour <= 12:
+        raise ValueError('hour must be in 1..12')
+    hour %= 12
+    if meridiem.lower() == 'pm':
+        hour += 12
+    return hour
+
+
 def parse_leave_time(value, relative_to=None):
-    # Assumes English locale.
-    try:
-        return TRANSLINK_TZ.localize(datetime.strptime(value, '%I:%M%p %Y-%m-%d'))
-    except ValueError:
-        if not relative_to:
-            relative_to = datetime.now(TRANSLINK_TZ)
-        parsed = TRANSLINK_TZ.localize(datetime.strptime(value, '%I:%M%p'))
-        parsed = relative_to.replace(
-            hour=parsed.hour, minute=parsed.minute, second=0, microsecond=0)
-        # Time has no date? Assume it's for tomorrow.
-        parsed += timedelta(days=1)
-        return parsed
+    match = _LEAVE_TIME_RE.fullmatch(value)
+    if not match:
+        raise ValueError(f'Unrecognized leave time {value!r}')
+    hour, minute, meridiem, year, month, day = match.groups()
+    hour = _hour_24(hour, meridiem)
+    if year:
+        return datetime(int(year), int(month), int(day), hour, int(minute), tzinfo=TRANSLINK_TZ)
+
+    if not relative_to:
+        relative_to = datetime.now(TRANSLINK_TZ)
+    parsed = relative_to.replace(
+        hour=hour, minute=int(minute), second=0, microsecond=0)
+    # Time has no date? Assume it's for tomorrow.
+    parsed += _ONE_DAY
+    return parsed
 
 
 def parse_last_update(value, relative_to=None):
-    # Assumes English locale.
+    match = _LAST_UPDATE_RE.fullmatch(value)
+    if not match:
+        raise ValueError(f'Unrecognized last update time {value!r}')
+    hour, minute, second, meridiem = match.groups()
+
     if not relative_to:
         relative_to = datetime.now(TRANSLINK_TZ)
-    parsed = datetime.strptime(value, '%I:%M:%S %p')
     parsed = relative_to.replace(
-        hour=parsed.hour, minute=parsed.minute, second=parsed.second, microsecond=0)
+        hour=_hour_24(hour, meridiem), minute=int(minute), second=int(second), microsecond=0)
     if parsed > relative_to:
-        parsed -= timedelta(days=1)
+        parsed -= _ONE_DAY
     return parsed
 
 
+class TimeField(fields.Field):
+    """
+    A field for TransLink's time formats, deserialized by a parser like :func:`parse_leave_time`.
+    """
+
+    def __init__(self, parse, **kwargs):
+        super().__init__(**kwargs)
+        self.parse = parse
+
+    def _deserialize(self, value, attr, data, **kwargs):
+        try:
+            return self.parse(value)
+        except (TypeError, ValueError) as e:
+            raise ValidationError(str(e)) from e
+
+
 class ScheduleSchema(Schema):
     Pattern = fields.String(required=True)
     Destination = fields.String(required=True)
-    ExpectedLeaveTime = fields.Function(
-        deserialize=parse_leave_time, required=True)
+    ExpectedLeaveTime = TimeField(parse_leave_time, required=True)
     ExpectedCountdown = fields.Integer(required=True)
     ScheduleStatus = fields.String(required=True)
     CancelledTrip = fields.Boolean(required=True)
     CancelledStop = fields.Boolean(required=True)
     AddedTrip = fields.Boolean(required=True)
     AddedStop = fields.Boolean(required=True)
-    LastUpdate = fields.Function(deserialize=parse_last_update, required=True)
+    LastUpdate = TimeField(parse_last_update, required=True)
 
     @post_load
     def make_obj(self, js, **kwargs):
         return Schedule(**js)
 
 
+def _is_http_url(value):
+    # TransLink's own links; a prefix check is enough, and cheaper than full URL validation.
+    return value.startswith(('http://', 'https://'))
+
+
+def _validate_http_url(value):
+    if not _is_http_url(value):
+        raise ValidationError('Not an absolute URL.')
+
+
 class RouteMapSchema(Schema):
-    Href = fields.Url(relative=False, required=True)
+    Href = fields.String(required=True, validate=_validate_http_url)
 
     @post_load
     def make_obj(self, js, **kwargs):
@@ -281,7 +333,7 @@ class BusSchema(Schema):
     Pattern = fields.String(required=True)
     Latitude = fields.Float(required=True)
     Longitude = fields.Float(required=True)
-    RecordedTime = fields.Function(deserialize=parse_last_update, required=True)
+    RecordedTime = TimeField(parse_last_update, required=True)
     RouteMap = fields.Nested(RouteMapSchema, many=False, required=True)
 
     @post_load
@@ -320,19 +372,182 @@ class StatusSchema(Schema):
         return Status(**js)
 
 
+# Schemas are stateless once built, so share one instance per shape.
+_STOP_SCHEMA = StopSchema()
+_STOPS_SCHEMA = StopSchema(many=True)
+_STOP_ESTIMATES_SCHEMA = StopEstimateSchema(many=True)
+_BUS_SCHEMA = BusSchema()
+_BUSES_SCHEMA = BusSchema(many=True)
+_ROUTE_SCHEMA = RouteSchema()
+_ROUTES_SCHEMA = RouteSchema(many=True)
+_STATUSES_SCHEMA = StatusSchema(many=True)
+
+
+# Hand-written loaders producing the same objects as the schemas above,
+# without marshmallow's per-field dispatch, which dominates load time for large
+# responses like buses(). Anything unexpected makes them raise, and the schema
+# is then used instead, so that it reports the problem as usual.
+
+def _check_fields(js, cls):
+    # Required fields are looked up individually, so any extra key is one the schema would reject.
+    if len(js) != len(cls._fields):
+        raise ValueError(f'Unexpected fields for {cls.__name__}')
+
+
+def _str(value):
+    if not isinstance(value, str):
+        raise TypeError(f'Not a string: {value!r}')
+    return value
+
+
+def _interned(value):
+    # For fields with few distinct values that repeat across a response, like destinations.
+    # Repeats then share one string object, and compare faster.
+    return sys.intern(_str(value))
+
+
+def _int(value):
+    if isinstance(value, bool):
+        raise TypeError(f'Not an integer: {value!r}')
+    return int(value)
+
+
+def _float(value):
+    if isinstance(value, bool):
+        raise TypeError(f'Not a number: {value!r}')
+    try:
+        value = float(value)
+    except OverflowError:
+        # A huge integer; the schema reports it as too large, instead of overflowing.
+        raise ValueError(f'Number too large: {value!r}') from None
+    if not math.isfinite(value):
+        raise ValueError(f'Not a finite number: {value!r}')
+    return value
+
+
+def _bool(value):
+    if value in fields.Boolean.truthy:
+        return True
+    if value in fields.Boolean.falsy:
+        return False
+    raise ValueError(f'Not a boolean: {value!r}')
+
+
+def _load_stop(js):
+    _check_fields(js, Stop)
+    return Stop(
+        StopNo=_int(js['StopNo']), Name=_str(js['Name']), BayNo=_str(js['BayNo']),
+        City=_interned(js['City']), OnStreet=_str(js['OnStreet']), AtStreet=_str(js['AtStreet']),
+        Latitude=_float(js['Latitude']), Longitude=_float(js['Longitude']),
+        WheelchairAccess=_bool(js['WheelchairAccess']), Distance=_int(js['Distance']),
+        Routes=_str(js['Routes']))
+
+
+def _load_route_map(js):
+    _check_fields(js, RouteMap)
+    href = _str(js['Href'])
+    if not _is_http_url(href):
+        raise ValueError(f'Not an absolute URL: {href!r}')
+    return RouteMap(Href=href)
+
+
+def _load_schedule(js):
+    _check_fields(js, Schedule)
+    return Schedule(
+        Pattern=_interned(js['Pattern']), Destination=_interned(js['Destination']),
+        ExpectedLeaveTime=parse_leave_time(js['ExpectedLeaveTime']),
+        ExpectedCountdown=_int(js['ExpectedCountdown']), ScheduleStatus=_interned(js['ScheduleStatus']),
+        CancelledTrip=_bool(js['CancelledTrip']), CancelledStop=_bool(js['CancelledStop']),
+        AddedTrip=_bool(js['AddedTrip']), AddedStop=_bool(js['AddedStop']),
+        LastUpdate=parse_last_update(js['LastUpdate']))
+
+
+def _load_stop_estimate(js):
+    _check_fields(js, StopEstimate)
+    return StopEstimate(
+        RouteNo=_interned(js['RouteNo']), RouteName=_str(js['RouteName']), Direction=_interned(js['Direction']),
+        RouteMap=_load_route_map(js['RouteMap']),
+        Schedules=_load_list(_load_schedule, js['Schedules']))
+
+
+def _load_bus(js):
+    _check_fields(js, Bus)
+    return Bus(
+        VehicleNo=_str(js['VehicleNo']), TripId=_int(js['TripId']), RouteNo=_interned(js['RouteNo']),
+        Direction=_interned(js['Direction']), Destination=_interned(js['Destination']),
+        Pattern=_interned(js['Pattern']),
+        Latitude=_float(js['Latitude']), Longitude=_float(js['Longitude']),
+        RecordedTime=parse_last_update(js['RecordedTime']), RouteMap=_load_route_map(js['RouteMap']))
+
+
+def _load_pattern(js):
+    _check_fields(js, Pattern)
+    return Pattern(
+        PatternNo=_str(js['PatternNo']), Destination=_interned(js['Destination']),
+        RouteMap=_load_route_map(js['RouteMap']), Direction=_interned(js['Direction']))
+
+
+def _load_route(js):
+    _check_fields(js, Route)
+    return Route(
+        RouteNo=_str(js['RouteNo']), Name=_str(js['Name']), OperatingCompany=_interned(js['OperatingCompany']),
+        Patterns=_load_list(_load_pattern, js['Patterns']))
+
+
+def _load_status(js):
+    _check_fields(js, Status)
+    return Status(Name=_str(js['Name']), Value=_str(js['Value']))
+
+
+def _load_list(load_one, js):
+    if not isinstance(js, list):
+        raise TypeError(f'Not a list: {js!r}')
+    return [load_one(item) for item in js]
+
+
+_load_stops = partial(_load_list, _load_stop)
+_load_stop_estimates = partial(_load_list, _load_stop_estimate)
+_load_buses = partial(_load_list, _load_bus)
+_load_routes = partial(_load_list, _load_route)
+_load_statuses = partial(_load_list, _load_status)
+
+
 class RTTI(TransLinkAPIBase):
     """
     The wrapper around TransLink's Real-Time Transit Information (RTTI) API.
     """
 
-    def __init__(self, api_key, session=None):
+    def __init__(self, api_key, session=None, cache_ttl=None):
         """
         :param api_key: TransLink API key.
         :param requests.Session session: Session to use, instead of the default.
+            The default session keeps connections alive for reuse,
+            and retries requests that fail with a 502, 503, or 504 status.
+        :param float cache_ttl: If set, reuse results of :meth:`stop`, :meth:`stops`,
+            :meth:`route`, and :meth:`routes` for this many seconds.
+            These change rarely. Real-time results and errors are never cached.
         """
-        super(RTTI, self).__init__(
+        super().__init__(
             'https://api.translink.ca/rttiapi/v1/',
             api_key=api_key, session=session)
+        self._cache = TTLCache(cache_ttl) if cache_ttl else None
+
+    def _get_cached(self, url_endpoint, schema, params=None, loader=None):
+        if self._cache is None:
+            return self._get_deserialized(url_endpoint, schema, params=params, loader=loader)
+
+        # Cache the decoded JSON, and build new objects on every hit,
+        # so that callers modifying a result (or its nested lists) don't affect the cache.
+        key = (url_endpoint, tuple(sorted((params or {}).items())))
+        js = self._cache.get(key)
+        if js is not None:
+            return self._deserialize(js, schema, loader=loader)
+
+        js = self._get_decoded(url_endpoint, params=params)
+        # Only cache responses that deserialize successfully.
+        result = self._deserialize(js, schema, loader=loader)
+        self._cache.set(key, js)
+        return result
 
     def stop(self, stop_number):
         """
@@ -341,10 +556,10 @@ class RTTI(TransLinkAPIBase):
         :param stop_number: 5-digit bus stop number.
         :rtype: Stop
         """
-        return self._get_deserialized('stops/{}'.format(stop_number), StopSchema())
+        return self._get_cached(f'stops/{stop_number}', _STOP_SCHEMA, loader=_load_stop)
 
     def _stops(self, **kwargs):
-        return self._get_deserialized('stops', StopSchema(many=True), params=kwargs)
+        return self._get_cached('stops', _STOPS_SCHEMA, params=kwargs, loader=_load_stops)
 
     def stops(self, lat, long, radius_m=None, route_number=None):
         """
@@ -357,7 +572,7 @@ class RTTI(TransLinkAPIBase):
         :rtype: list[Stop]
         """
         return self._stops(
-            lat='{:.6f}'.format(lat), long='{:.6f}'.format(long),
+            lat=f'{lat:.6f}', long=f'{long:.6f}',
             radius=radius_m, routeno=route_number)
 
     def stop_estimates(self, stop_number, count=None, timeframe=None, route_number=None):
@@ -373,9 +588,29 @@ class RTTI(TransLinkAPIBase):
         :rtype: list[StopEstimate]
         """
         return self._get_deserialized(
-            'stops/{}/estimates'.format(stop_number),
-            StopEstimateSchema(many=True),
-            params={'count': count, 'timeframe': timeframe, 'routeNo': route_number})
+            f'stops/{stop_number}/estimates',
+            _STOP_ESTIMATES_SCHEMA,
+            params={'count': count, 'timeframe': timeframe, 'routeNo': route_number},
+            loader=_load_stop_estimates)
+
+    def stop_estimates_bulk(self, stop_numbers, count=None, timeframe=None, route_number=None, max_workers=None):
+        """
+        Gets the next bus estimates for several stops, requesting them concurrently.
+
+        :param stop_numbers: Five-digit stop numbers.
+        :param int count: The number of buses to return per stop. Default 6.
+        :param int timeframe: The search time frame in minutes. Default 120.
+        :param route_number: If present, will search for stops specific to route.
+        :param int max_workers: The most requests to have in flight at once.
+            Defaults to the size of the default session's connection pool.
+        :returns: For each stop, in the same order as ``stop_numbers``,
+            its list of :class:`StopEstimate`, as from :meth:`stop_estimates`.
+        :rtype: list[list[StopEstimate]]
+        :raises TransLinkAPIError: If estimates can't be retrieved for any stop.
+        """
+        return self._map_concurrently(
+            partial(self.stop_estimates, count=count, timeframe=timeframe, route_number=route_number),
+            stop_numbers, max_workers)
 
     def bus(self, bus_number):
         """
@@ -387,7 +622,7 @@ class RTTI(TransLinkAPIBase):
             .. note:: This endpoint erroneously rejects 5-digit bus numbers.
         :rtype: Bus
         """
-        return self._get_deserialized('buses/{}'.format(bus_number), BusSchema(many=False))
+        return self._get_deserialized(f'buses/{bus_number}', _BUS_SCHEMA, loader=_load_bus)
 
     def buses(self, stop_number=None, route_number=None):
         """
@@ -398,8 +633,9 @@ class RTTI(TransLinkAPIBase):
         :rtype: list[Bus]
         """
         return self._get_deserialized(
-            'buses', BusSchema(many=True),
-            params={'stopNo': stop_number, 'routeNo': route_number})
+            'buses', _BUSES_SCHEMA,
+            params={'stopNo': stop_number, 'routeNo': route_number},
+            loader=_load_buses)
 
     def route(self, route_number):
         """
@@ -408,8 +644,21 @@ class RTTI(TransLinkAPIBase):
         :param route_number: A bus route number.
         :rtype: Route
         """
-        return self._get_deserialized(
-            'routes/{}'.format(route_number), RouteSchema(many=False))
+        return self._get_cached(
+            f'routes/{route_number}', _ROUTE_SCHEMA, loader=_load_route)
+
+    def routes_bulk(self, route_numbers, max_workers=None):
+        """
+        Get several routes by their route numbers, requesting them concurrently.
+
+        :param route_numbers: Bus route numbers.
+        :param int max_workers: The most requests to have in flight at once.
+            Defaults to the size of the default session's connection pool.
+        :returns: The routes, in the same order as ``route_numbers``.
+        :rtype: list[Route]
+        :raises TransLinkAPIError: If any route can't be retrieved.
+        """
+        return self._map_concurrently(self.route, route_numbers, max_workers)
 
     def routes(self, stop_number=None):
         """
@@ -424,8 +673,9 @@ class RTTI(TransLinkAPIBase):
                 in practice, this parameter is required.
         :rtype: list[Route]
         """
-        return self._get_deserialized(
-            'routes', RouteSchema(many=True), params={'stopNo': stop_number})
+        return self._get_cached(
+            'routes', _ROUTES_SCHEMA, params={'stopNo': stop_number},
+            loader=_load_routes)
 
     def status(self, service='all'):
         """
@@ -438,4 +688,4 @@ class RTTI(TransLinkAPIBase):
             * ``all`` for both services
         :rtype: list[Status]
         """
-        return self._get_deserialized('status/{}'.format(service), StatusSchema(many=True))
+        return self._get_deserialized(f'status/{service}', _STATUSES_SCHEMA, loader=_load_statuses)